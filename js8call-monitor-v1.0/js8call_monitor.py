@@ -27,44 +27,108 @@ import re
 import pywsjtx
 import requests
 import threading
+import collections
 import string
 import warnings
 import smtplib
-from distutils.util import strtobool
 from email.mime.text import MIMEText
 
-# Import python version sprecific modules
-if sys.version_info.major == 3:
-    import queue
-elif sys.version_info.major == 2:
-    import Queue
-else:
-    raise NotImplementedError
-
-# Define aliases for python version sprecific functions
-if sys.version_info.major == 3:
-    def itervalues(d):
-        return iter(d.values())
-    def iteritems(d):
-        return iter(d.items())
-    def listvalues(d):
-        return list(d.values())
-    def listitems(d):
-        return list(d.items())
-elif sys.version_info.major == 2:
-    def itervalues(d):
-        return d.itervalues()
-    def iteritems(d):
-        return d.iteritems()
-    def listvalues(d):
-        return d.values()
-    def listitems(d):
-        return d.items()
-else:
-    raise NotImplementedError
-
-
-class tcp_client:
+# Dictionary iteration helpers, kept from the Python 2 compatible days
+def itervalues(d):
+    return iter(d.values())
+def iteritems(d):
+    return iter(d.items())
+def listvalues(d):
+    return list(d.values())
+def listitems(d):
+    return list(d.items())
+
+# The config lives next to the scripts, wherever they are started from
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config')
+
+# Values strtobool accepted as true, anything else reads as false
+_TRUE = frozenset({'y', 'yes', 't', 'true', 'on', '1'})
+
+def truthy(s):
+    """ Convert a config string to a bool """
+    return s.strip().lower() in _TRUE
+
+def read_config(config=None):
+    """ Return an already parsed config, or parse the config file """
+    if config is None:
+        # No %-interpolation, the same as the settings dialog so anything
+        # it saves can be read back
+        config = configparser.ConfigParser(interpolation=None)
+        config.read(CONFIG_PATH)
+    return config
+
+
+class MessageQueue:
+    """ Class MessageQueue - lightweight deque backed replacement for queue.Queue
+
+    Producers put messages, the consumer takes everything queued at once with
+    drain(). The lock keeps the emptiness event in step with the deque, and
+    the listener lets the consumer be woken rather than poll.
+    """
+
+    def __init__(self):
+        self._deque = collections.deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Event()
+        self._listener = None
+
+    def set_listener(self, listener):
+        """ Call listener() from put whenever the queue stops being empty """
+        self._listener = listener
+
+    def put(self, item):
+        """ Append an item and wake any blocked consumer """
+        with self._lock:
+            self._deque.append(item)
+            woke = not self._not_empty.is_set()
+            self._not_empty.set()
+        listener = self._listener
+        if woke and listener:
+            listener()
+
+    def put_batch(self, items):
+        """ Append several items under one lock and wake any blocked consumer """
+        if not items:
+            return
+        with self._lock:
+            self._deque.extend(items)
+            woke = not self._not_empty.is_set()
+            self._not_empty.set()
+        listener = self._listener
+        if woke and listener:
+            listener()
+
+    def wait(self, timeout=None):
+        """ Block until something is queued, returns False on timeout """
+        return self._not_empty.wait(timeout)
+
+    def drain(self):
+        """ Remove and return everything queued as a list in one locked swap """
+        with self._lock:
+            pending, self._deque = self._deque, collections.deque()
+            self._not_empty.clear()
+        return list(pending)
+
+
+class status_reporter:
+    """ Class status_reporter - shared status callback handling for the producers """
+    status_callback = None
+
+    def set_status(self, connected):
+        """ Report a connection state change to the status callback """
+        if self.status_callback:
+            try:
+                self.status_callback(connected)
+            except Exception as e:
+                print("%s: Status callback failed: %s" % (type(self).__name__, e))
+
+
+class tcp_client(status_reporter):
     """ Class TCP Client to connect to JS8Call TCP API and push JSON messages to msgQueue """
     config = None
     js8host = ""
@@ -72,16 +136,18 @@ class tcp_client:
     poll_interval = 5
     enabled = False
 
-    def __init__(self):
-        self.config = configparser.ConfigParser()
-        self.config.read('config')
+    def __init__(self, status_callback=None, config=None):
+        # status_callback(connected) is called from the client thread
+        # whenever the connection to JS8Call comes up or goes down
+        self.status_callback = status_callback
+        self.config = read_config(config)
         # read settings from [TCP] section (add these keys to your config)
         # enabled = true/false
         # host = 127.0.0.1
         # port = 2171
         # poll_status_interval = 5
         try:
-            self.enabled = bool(strtobool(self.config['TCP']['enabled']))
+            self.enabled = truthy(self.config['TCP']['enabled'])
         except Exception:
             self.enabled = False
         try:
@@ -106,15 +172,15 @@ class tcp_client:
         """ Connect to JS8Call TCP API, read lines, and push to msgQueue """
         while True:
             sock = None
+            connected = False
             try:
                 sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 sock.settimeout(10)
                 sock.connect((self.js8host, int(self.js8port)))
+                connected = True
+                self.set_status(True)
                 # wrap socket as file-like to read newline-terminated JSON messages
-                if sys.version_info.major < 3:
-                    sf = sock.makefile('r')
-                else:
-                    sf = sock.makefile('r', encoding='utf-8', newline='\n')
+                sf = sock.makefile('r', encoding='utf-8', newline='\n')
                 print("tcp_client: Connected to %s:%s" % (self.js8host, self.js8port))
 
                 # read loop
@@ -155,6 +221,8 @@ class tcp_client:
                         sock.close()
                 except Exception:
                     pass
+                if connected:
+                    self.set_status(False)
 
             # wait before attempting to reconnect
             time.sleep(self.poll_interval)
@@ -333,9 +401,8 @@ class JS8CallMonitor:
     host_data = {}
     radio_data = {}
 
-    def __init__(self):
-        self.config = configparser.ConfigParser()
-        self.config.read('config')
+    def __init__(self, config=None):
+        self.config = read_config(config)
         self.adif_CLASS = self.config['STATION']['class']        
         self.adif_MY_CNTY = self.config['STATION']['my_county']
         self.adif_MY_GRIDSQUARE = self.config['STATION']['my_gridsquare']
@@ -345,24 +412,24 @@ class JS8CallMonitor:
         self.consolelevel = int(self.config['DEBUG']['consolelevel'])
         self.logfilelevel = int(self.config['DEBUG']['logfilelevel'])
         self.logfile = str(self.config['DEBUG']['logfile'])
-        self.smtpenabled = bool(strtobool(self.config['SMTP']['enabled']))
+        self.smtpenabled = truthy(self.config['SMTP']['enabled'])
         self.smtphost = str(self.config['SMTP']['host'])
         self.smtpport = str(self.config['SMTP']['port'])
         self.smtpuser = str(self.config['SMTP']['user'])
         self.smtppass = str(self.config['SMTP']['pass'])
         self.mailfrom = str(self.config['SMTP']['mailfrom'])
         self.mailto = str(self.config['SMTP']['mailto'])
-        self.gridfrominfo = bool(strtobool(self.config['GRIDS']['frominfo']))
+        self.gridfrominfo = truthy(self.config['GRIDS']['frominfo'])
         self.gridlength = int(self.config['GRIDS']['gridlength'])
-        self.mapall = bool(strtobool(self.config['GRIDS']['map_all']))
-        self.mapcq = bool(strtobool(self.config['GRIDS']['map_cq']))
-        self.mapheartbeat = bool(strtobool(self.config['GRIDS']['map_heartbeat']))
-        self.mapinfo = bool(strtobool(self.config['GRIDS']['map_info']))
-        self.mapstatusmsg = bool(strtobool(self.config['GRIDS']['map_status']))
-        self.maplog = bool(strtobool(self.config['GRIDS']['map_log']))
-        self.mapqso = bool(strtobool(self.config['GRIDS']['map_qso']))
-        self.mapsnr = bool(strtobool(self.config['GRIDS']['map_snr']))
-        self.autoclose = bool(strtobool(self.config['GRIDS']['auto_close']))
+        self.mapall = truthy(self.config['GRIDS']['map_all'])
+        self.mapcq = truthy(self.config['GRIDS']['map_cq'])
+        self.mapheartbeat = truthy(self.config['GRIDS']['map_heartbeat'])
+        self.mapinfo = truthy(self.config['GRIDS']['map_info'])
+        self.mapstatusmsg = truthy(self.config['GRIDS']['map_status'])
+        self.maplog = truthy(self.config['GRIDS']['map_log'])
+        self.mapqso = truthy(self.config['GRIDS']['map_qso'])
+        self.mapsnr = truthy(self.config['GRIDS']['map_snr'])
+        self.autoclose = truthy(self.config['GRIDS']['auto_close'])
         self.mapnoinfo = str(self.config['NOINFO']['map'])
         self.mapnoinfocolor = str(self.config['NOINFO']['color'])
         self.mapnoinfoaprs = str(self.config['NOINFO']['aprs'])
@@ -373,32 +440,32 @@ class JS8CallMonitor:
         self.mapstatuscolor = str (self.config['STATUS']['color'])
         self.mapstatusaprs = str (self.config['STATUS']['aprs'])
         self.grid_databases = str(self.config['DATABASES']['location'])
-        self.fcc_lookup = bool(strtobool(self.config['DATABASES']['FccData']))
-        self.hamcallcd_lookup = bool(strtobool(self.config['DATABASES']['HamCallCD']))
-        self.raccd_lookup = bool(strtobool(self.config['DATABASES']['RacCD']))
-        self.local_lookup = bool(strtobool(self.config['DATABASES']['LocalDB']))
-        self.local_learn = bool(strtobool(self.config['DATABASES']['LocalDB_learn']))
-        self.collect_rejects = bool(strtobool(self.config['DATABASES']['Collect_Rejects']))
-        self.callook_lookup = bool(strtobool(self.config['DATABASES']['Callook']))
-        self.hamcallol_lookup = bool(strtobool(self.config['DATABASES']['HamCallOnline']))
+        self.fcc_lookup = truthy(self.config['DATABASES']['FccData'])
+        self.hamcallcd_lookup = truthy(self.config['DATABASES']['HamCallCD'])
+        self.raccd_lookup = truthy(self.config['DATABASES']['RacCD'])
+        self.local_lookup = truthy(self.config['DATABASES']['LocalDB'])
+        self.local_learn = truthy(self.config['DATABASES']['LocalDB_learn'])
+        self.collect_rejects = truthy(self.config['DATABASES']['Collect_Rejects'])
+        self.callook_lookup = truthy(self.config['DATABASES']['Callook'])
+        self.hamcallol_lookup = truthy(self.config['DATABASES']['HamCallOnline'])
         self.hamcallol_username = str(self.config['DATABASES']['HCusername'])
         self.hamcallol_password = str(self.config['DATABASES']['HCpassword'])
-        self.n1mmenabled = bool(strtobool(self.config['N1MM']['enabled']))
+        self.n1mmenabled = truthy(self.config['N1MM']['enabled'])
         self.n1mmhost = self.config['N1MM']['host']
         self.n1mmport = self.config['N1MM']['port']
-        self.gtenabled = bool(strtobool(self.config['GRIDTRACKER']['enabled']))
+        self.gtenabled = truthy(self.config['GRIDTRACKER']['enabled'])
         self.gthost = self.config['GRIDTRACKER']['host']
         self.gtport = self.config['GRIDTRACKER']['port']
-        self.gsmsgenabled = bool(strtobool(self.config['GEOSERVER']['enabled_msg']))
-        self.gsspotenabled = bool(strtobool(self.config['GEOSERVER']['enabled_spot']))
+        self.gsmsgenabled = truthy(self.config['GEOSERVER']['enabled_msg'])
+        self.gsspotenabled = truthy(self.config['GEOSERVER']['enabled_spot'])
         self.gshost = self.config['GEOSERVER']['host']
         self.gsport = self.config['GEOSERVER']['port']
         self.gsauth = self.config['GEOSERVER']['token']
-        self.yaacenabled = bool(strtobool(self.config['YAAC']['enabled']))
+        self.yaacenabled = truthy(self.config['YAAC']['enabled'])
         self.yaaclogfile = str(self.config['YAAC']['logfile'])
-        self.adifenabled = bool(strtobool(self.config['ADIF']['enabled']))
+        self.adifenabled = truthy(self.config['ADIF']['enabled'])
         self.adiflogfile = str(self.config['ADIF']['logfile'])        
-        self.authenabled = bool(strtobool(self.config['AUTH']['enabled']))
+        self.authenabled = truthy(self.config['AUTH']['enabled'])
         self.authtoken = str(self.config['AUTH']['token'])        
         self.reset_vals()
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -574,15 +641,13 @@ class JS8CallMonitor:
         self.adif_VE_PROV = ""
         self.adif_WWPMC = ""
 
-    def parse_json(self):
-        """ Parse json message """
+    def parse_json(self, msgJSON):
+        """ Parse json message drained from msgQueue """
         # pylint: disable=too-many-branches
         # pylint: disable=too-many-statements
         # It's a parser after all
         self.debug_log(self.log_entry,"parse_json: --Enter--")
         try:
-            self.debug_log(self.log_info,"parse_json: Getting message from queue")
-            msgJSON = msgQueue.get()
             self.debug_log(self.log_debug,"parse_json: Removing non-ascii garbage")
             msgJSON = str(re.sub(r'[^\x00-\x7f]',r'',msgJSON))
             self.debug_log(self.log_hidebug,"parse_json: Raw JSON: %s" %msgJSON)
@@ -591,7 +656,6 @@ class JS8CallMonitor:
             source = str(msgIndex[0])
             message_raw = str(msgIndex[1])
             message = json.loads(msgIndex[1])
-            msgQueue.task_done()
         except:
             message_raw = {}
             message = {}
@@ -3127,15 +3191,13 @@ class JS8CallMonitor:
         self.debug_log(self.log_entry,"queue_cmd: --Exit--")
         return
 
-    def parse_cmd(self):
-        """ Parse command message """
+    def parse_cmd(self, cmdJSON):
+        """ Parse command message drained from cmdQueue """
         # pylint: disable=too-many-branches
         # pylint: disable=too-many-statements
         # It's a parser after all
         self.debug_log(self.log_entry,"parse_cmd: --Enter--")
         try:
-            self.debug_log(self.log_info,"parse_cmd: Getting command from queue")
-            cmdJSON = cmdQueue.get()
             self.debug_log(self.log_debug,"parse_cmd: Removing non-ascii garbage")
             cmdJSON = str(re.sub(r'[^\x00-\x7f]',r'',cmdJSON))
             self.debug_log(self.log_hidebug,"parse_cmd: Raw JSON: %s" %cmdJSON)
@@ -3144,7 +3206,6 @@ class JS8CallMonitor:
             dest = str(cmdIndex[0])
             command_raw = str(cmdIndex[1])
             command = json.loads(cmdIndex[1])
-            cmdQueue.task_done()
         except:
             command_raw = {}
             command = {}
@@ -3346,15 +3407,18 @@ class JS8CallMonitor:
         self.debug_log(self.log_entry,"send_cmd: --Exit--")
         return
 
-class udp_server:
+class udp_server(status_reporter):
     """ Class UDP Server """
     config = ""
     js8host = ""
     js8port = ""
+    batch_size = 64
     
-    def __init__(self):
-        self.config = configparser.ConfigParser()
-        self.config.read('config')
+    def __init__(self, status_callback=None, config=None):
+        # status_callback(connected) is called from the server thread once
+        # the socket is bound and again if it fails
+        self.status_callback = status_callback
+        self.config = read_config(config)
         self.js8host = self.config['JS8Call']['host']
         self.js8port = self.config['JS8Call']['port']
         print("udp_server: Host: " + self.js8host)
@@ -3365,34 +3429,36 @@ class udp_server:
         print("udp_server: Started > %s \n" % msgServer.is_alive())
 
     def run(self):
+        # MSG_DONTWAIT is not available on Windows, there we read one
+        # datagram per call as before
+        dontwait = getattr(socket, 'MSG_DONTWAIT', 0)
+        recv_buffer = bytearray(65500)
+        recv_view = memoryview(recv_buffer)
         try:
-            addr = ""
-            recv_buffer = ""
             sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             sock.bind((self.js8host,int(self.js8port)))
+            self.set_status(True)
             while True:
-                recv_buffer, addr = sock.recvfrom(65500)
-                if sys.version_info.major < 3:
-                    msg = str(addr) + "|" + str(recv_buffer)
-                else:
-                    msg = str(addr) + "|" + str(recv_buffer.decode('utf-8'))
-                msgQueue.put(msg)
-                addr = ""
-                recv_buffer = ""
+                # Block for the first datagram, then collect whatever else
+                # has already arrived and queue it all in one go
+                nbytes, addr = sock.recvfrom_into(recv_buffer)
+                batch = [str(addr) + "|" + str(recv_view[:nbytes], 'utf-8')]
+                while dontwait and len(batch) < self.batch_size:
+                    try:
+                        nbytes, addr = sock.recvfrom_into(recv_buffer, 0, dontwait)
+                    except BlockingIOError:
+                        break
+                    batch.append(str(addr) + "|" + str(recv_view[:nbytes], 'utf-8'))
+                msgQueue.put_batch(batch)
         except socket.error as msg:
+            self.set_status(False)
             sys.stderr.write("[ERROR] %s" % msg)
             sys.exit(2)
 
 if __name__ == "__main__":
     # Queues
-    if sys.version_info.major == 3:
-        msgQueue = queue.Queue()
-        cmdQueue = queue.Queue()
-    elif sys.version_info.major == 2:
-        msgQueue = Queue.Queue()
-        cmdQueue = Queue.Queue()
-    else:
-        raise NotImplementedError
+    msgQueue = MessageQueue()
+    cmdQueue = MessageQueue()
 
     print("JS8Call Monitor v0.21 written by KK7JND")
 
@@ -3400,30 +3466,34 @@ if __name__ == "__main__":
     J = JS8CallMonitor()
 
     # Decide whether to use TCP or UDP based on config:
-    tcp_enabled = False
-    try:
-        if 'TCP' in J.config:
-            tcp_enabled = bool(strtobool(J.config['TCP'].get('enabled', 'false')))
-    except Exception:
-        tcp_enabled = False
+    tcp_enabled = truthy(J.config.get('TCP', 'enabled', fallback='false'))
 
     if tcp_enabled:
         print("Starting TCP client...")
         # Start TCP client (it will push messages to msgQueue)
-        T = tcp_client()
+        T = tcp_client(config=J.config)
     else:
         print("Starting UDP server...")
-        S = udp_server()
+        S = udp_server(config=J.config)
 
     # Main processing loop
     while True:
-        while not msgQueue.empty():
-            J.parse_json()
-            J.reset_vals()
-        while not cmdQueue.empty():
-            J.parse_cmd()
-            J.reset_vals()
-        time.sleep(5)
+        # One bad message only drops itself, not the rest of the batch
+        for msg in msgQueue.drain():
+            try:
+                J.parse_json(msg)
+            except Exception as e:
+                print("Error parsing message: %s" % e)
+            finally:
+                J.reset_vals()
+        for cmd in cmdQueue.drain():
+            try:
+                J.parse_cmd(cmd)
+            except Exception as e:
+                print("Error parsing command: %s" % e)
+            finally:
+                J.reset_vals()
+        msgQueue.wait(5)
 
     # Cleanup (not normally reached)
     try:
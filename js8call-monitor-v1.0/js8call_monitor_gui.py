@@ -7,22 +7,34 @@ Displays connection status for all protocols with visual indicators
 
 import sys
 import os
-import configparser
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QGroupBox, QGridLayout, 
                              QPushButton, QDialog)
-from PyQt5.QtCore import QTimer, Qt, pyqtSignal, QThread
-from PyQt5.QtGui import QIcon, QPalette, QColor
+from PyQt5.QtCore import Qt, QObject, pyqtSignal, pyqtSlot, QThread
+from PyQt5.QtGui import QIcon, QPalette, QColor, QFont, QFontMetrics
 import socket
 import threading
 import signal
-from distutils.util import strtobool
 
 # Import the monitor module
 import js8call_monitor
 # Import the settings dialog
 from settings import SettingsDialog
 
+# Status LED style sheet, the colour follows the "state" property
+_LED_QSS = """
+    QLabel[state="on"] {
+        background-color: #00FF00;
+        border-radius: 10px;
+        border: 2px solid #008800;
+    }
+    QLabel[state="off"] {
+        background-color: #FF0000;
+        border-radius: 10px;
+        border: 2px solid #880000;
+    }
+"""
+
 class ConnectionStatus:
     """Track connection status for each protocol"""
     def __init__(self, name, protocol, host, port):
@@ -33,17 +45,7 @@ class ConnectionStatus:
         self.connected = False
         
     def check_connection(self):
-        """Check if connection is active"""
-        if self.protocol == "UDP":
-            # UDP is connectionless, so we check if socket is bound
-            try:
-                # For UDP server, always show as connected if configured
-                self.connected = True
-            except:
-                self.connected = False
-        elif self.protocol == "TCP":
-            # TCP connections are managed by tcp_client
-            self.connected = True  # Will be updated by the client
+        """Check if connection is active, kept current by the producers"""
         return self.connected
 
 class StatusIndicator(QWidget):
@@ -60,19 +62,31 @@ class StatusIndicator(QWidget):
         # Status LED
         self.led = QLabel()
         self.led.setFixedSize(20, 20)
-        self.update_led(False)
+        self.led.setProperty("state", "off")
+        self.led.setStyleSheet(_LED_QSS)
+        
+        # Size labels to their text, measured once, instead of fixed widths.
+        # The name is shown bold so it is measured with a bold font.
+        fm = self.fontMetrics()
+        bold = QFont(self.font())
+        bold.setBold(True)
+        bold_fm = QFontMetrics(bold)
         
         # Name label
         name_label = QLabel(f"<b>{self.status.name}</b>")
-        name_label.setMinimumWidth(120)
         
         # Protocol label
         protocol_label = QLabel(self.status.protocol)
-        protocol_label.setMinimumWidth(60)
         
         # Host:Port label
-        address_label = QLabel(f"{self.status.host}:{self.status.port}")
-        address_label.setMinimumWidth(150)
+        address = f"{self.status.host}:{self.status.port}"
+        address_label = QLabel(address)
+        
+        self._columns = (name_label, protocol_label, address_label)
+        self._column_widths = (bold_fm.horizontalAdvance(self.status.name) + 12,
+                               fm.horizontalAdvance(self.status.protocol) + 12,
+                               fm.horizontalAdvance(address) + 12)
+        self.set_column_widths(self._column_widths)
         
         layout.addWidget(self.led)
         layout.addWidget(name_label)
@@ -82,59 +96,69 @@ class StatusIndicator(QWidget):
         
         self.setLayout(layout)
         
+    def column_widths(self):
+        """Widths the name, protocol and address labels need for their text"""
+        return self._column_widths
+        
+    def set_column_widths(self, widths):
+        """Set the minimum widths of the name, protocol and address labels"""
+        for label, width in zip(self._columns, widths):
+            label.setMinimumWidth(width)
+        
     def update_led(self, connected):
         """Update LED color based on connection status"""
-        if connected:
-            self.led.setStyleSheet("""
-                QLabel {
-                    background-color: #00FF00;
-                    border-radius: 10px;
-                    border: 2px solid #008800;
-                }
-            """)
-        else:
-            self.led.setStyleSheet("""
-                QLabel {
-                    background-color: #FF0000;
-                    border-radius: 10px;
-                    border: 2px solid #880000;
-                }
-            """)
+        if self.status.connected == connected:
+            # Nothing changed, skip the style recalculation
+            return
+        # Flip the property and repolish rather than replacing the sheet
+        self.led.setProperty("state", "on" if connected else "off")
+        style = self.led.style()
+        style.unpolish(self.led)
+        style.polish(self.led)
         self.status.connected = connected
-        
-    def check_status(self):
-        """Check and update connection status"""
-        connected = self.status.check_connection()
-        self.update_led(connected)
-        return connected
 
-class MonitorThread(QThread):
-    """Thread to run the JS8Call monitor"""
+class MonitorWorker(QObject):
+    """Runs the JS8Call monitor inside a QThread event loop"""
     error_signal = pyqtSignal(str)
+    connection_changed = pyqtSignal(str, bool)
+    wake = pyqtSignal()
     
     def __init__(self, monitor_instance):
         super().__init__()
         self.monitor = monitor_instance
-        self.running = True
+        self.wake.connect(self.process)
         
+    @pyqtSlot()
     def run(self):
-        """Main monitoring loop"""
-        import time
-        while self.running:
+        """Start processing once the worker thread is running"""
+        # Producers emit wake from their own threads, Qt queues it to ours
+        js8call_monitor.msgQueue.set_listener(self.wake.emit)
+        self.process()
+        
+    @pyqtSlot()
+    def process(self):
+        """Drain and parse everything queued"""
+        # Errors are caught per item, the drained batch is already out of
+        # the queue so one bad message must not drop the rest of it
+        for msg in js8call_monitor.msgQueue.drain():
             try:
-                while not js8call_monitor.msgQueue.empty():
-                    self.monitor.parse_json()
-                    self.monitor.reset_vals()
-                while not js8call_monitor.cmdQueue.empty():
-                    self.monitor.parse_cmd()
-                    self.monitor.reset_vals()
-                time.sleep(0.5)
+                self.monitor.parse_json(msg)
             except Exception as e:
                 self.error_signal.emit(str(e))
+            finally:
+                self.monitor.reset_vals()
+        for cmd in js8call_monitor.cmdQueue.drain():
+            try:
+                self.monitor.parse_cmd(cmd)
+            except Exception as e:
+                self.error_signal.emit(str(e))
+            finally:
+                self.monitor.reset_vals()
                 
+    @pyqtSlot()
     def stop(self):
-        """Stop the monitoring thread"""
-        self.running = False
+        """Stop taking wake ups from the producers"""
+        js8call_monitor.msgQueue.set_listener(None)
 
 class JS8CallMonitorGUI(QMainWindow):
     """Main GUI window for JS8Call Monitor"""
@@ -143,18 +167,22 @@ class JS8CallMonitorGUI(QMainWindow):
         super().__init__()
         self.monitor = None
         self.monitor_thread = None
+        self.monitor_worker = None
         self.tcp_client = None
         self.udp_server = None
+        self.source_indicator = None
         self.status_indicators = []
+        self._indicators_by_name = {}
+        
+        # Parse the config file once, shared with the monitor and producers
+        self._config = js8call_monitor.read_config()
         
         self.init_ui()
         self.load_config()
         self.start_monitor()
         
-        # Setup timer for status updates
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_status)
-        self.timer.start(2000)  # Update every 2 seconds
+        # Release sockets and files once the event loop is shutting down
+        QApplication.instance().aboutToQuit.connect(self.cleanup)
         
     def init_ui(self):
         """Initialize the user interface"""
@@ -233,20 +261,23 @@ class JS8CallMonitorGUI(QMainWindow):
         main_layout.addLayout(button_layout)
         central_widget.setLayout(main_layout)
         
+    def _bool(self, section, key, fallback='false'):
+        """Read a boolean value from the parsed config"""
+        value = self._config.get(section, key, fallback=fallback)
+        return js8call_monitor.truthy(value)
+        
+    def _add_indicator(self, layout, indicator):
+        """Show an indicator in a layout and register it by name"""
+        layout.addWidget(indicator)
+        self.status_indicators.append(indicator)
+        self._indicators_by_name[indicator.status.name] = indicator
+        
     def load_config(self):
         """Load configuration and create status indicators"""
-        config = configparser.ConfigParser()
-        config.read('config')
+        config = self._config
         
         # Check if TCP or UDP is enabled for source
-        tcp_enabled = False
-        try:
-            if 'TCP' in config:
-                tcp_enabled = bool(strtobool(config['TCP'].get('enabled', 'false')))
-        except:
-            tcp_enabled = False
-        
-        if tcp_enabled:
+        if self._bool('TCP', 'enabled'):
             # TCP source
             host = config['TCP'].get('host', '127.0.0.1')
             port = config['TCP'].get('port', '2171')
@@ -257,106 +288,110 @@ class JS8CallMonitorGUI(QMainWindow):
             port = config['JS8Call'].get('port', '2242')
             indicator = StatusIndicator("JS8Call (UDP)", "UDP", host, port)
         
-        self.source_layout.addWidget(indicator)
-        self.status_indicators.append(indicator)
+        self._add_indicator(self.source_layout, indicator)
+        self.source_indicator = indicator
         
         # N1MM client
-        if bool(strtobool(config['N1MM'].get('enabled', 'false'))):
+        if self._bool('N1MM', 'enabled'):
             host = config['N1MM'].get('host', '127.0.0.1')
             port = config['N1MM'].get('port', '12060')
             indicator = StatusIndicator("N1MM+", "UDP", host, port)
-            self.clients_layout.addWidget(indicator)
-            self.status_indicators.append(indicator)
+            self._add_indicator(self.clients_layout, indicator)
         
         # GridTracker client
-        if bool(strtobool(config['GRIDTRACKER'].get('enabled', 'false'))):
+        if self._bool('GRIDTRACKER', 'enabled'):
             host = config['GRIDTRACKER'].get('host', '127.0.0.1')
             port = config['GRIDTRACKER'].get('port', '2237')
             indicator = StatusIndicator("GridTracker", "UDP", host, port)
-            self.clients_layout.addWidget(indicator)
-            self.status_indicators.append(indicator)
+            self._add_indicator(self.clients_layout, indicator)
         
         # GeoServer client
-        gs_msg = bool(strtobool(config['GEOSERVER'].get('enabled_msg', 'false')))
-        gs_spot = bool(strtobool(config['GEOSERVER'].get('enabled_spot', 'false')))
+        gs_msg = self._bool('GEOSERVER', 'enabled_msg')
+        gs_spot = self._bool('GEOSERVER', 'enabled_spot')
         if gs_msg or gs_spot:
             host = config['GEOSERVER'].get('host', '127.0.0.1')
             port = config['GEOSERVER'].get('port', '8080')
             indicator = StatusIndicator("GeoServer", "UDP", host, port)
-            self.clients_layout.addWidget(indicator)
-            self.status_indicators.append(indicator)
+            self._add_indicator(self.clients_layout, indicator)
         
         # YAAC client
-        if bool(strtobool(config['YAAC'].get('enabled', 'false'))):
+        if self._bool('YAAC', 'enabled'):
             logfile = config['YAAC'].get('logfile', 'yaac.log')
             indicator = StatusIndicator("YAAC", "FILE", "Log", logfile)
-            self.clients_layout.addWidget(indicator)
-            self.status_indicators.append(indicator)
+            self._add_indicator(self.clients_layout, indicator)
         
         # ADIF client
-        if bool(strtobool(config['ADIF'].get('enabled', 'false'))):
+        if self._bool('ADIF', 'enabled'):
             logfile = config['ADIF'].get('logfile', 'adif.log')
             indicator = StatusIndicator("ADIF", "FILE", "Log", logfile)
-            self.clients_layout.addWidget(indicator)
-            self.status_indicators.append(indicator)
+            self._add_indicator(self.clients_layout, indicator)
+        
+        # Each row has its own layout, so give every row the widest width
+        # of each column to keep the columns lined up
+        widths = [max(column) for column in
+                  zip(*(indicator.column_widths() for indicator in self.status_indicators))]
+        
+        # Clients are connectionless UDP senders and log files, there is no
+        # link to watch so they show as up once configured. The source
+        # indicator is driven by its producer.
+        for indicator in self.status_indicators:
+            indicator.set_column_widths(widths)
+            if indicator is not self.source_indicator:
+                indicator.update_led(True)
             
     def start_monitor(self):
         """Start the JS8Call monitor"""
         try:
             # Initialize queues
-            if sys.version_info.major == 3:
-                import queue
-                js8call_monitor.msgQueue = queue.Queue()
-                js8call_monitor.cmdQueue = queue.Queue()
-            else:
-                import Queue
-                js8call_monitor.msgQueue = Queue.Queue()
-                js8call_monitor.cmdQueue = Queue.Queue()
+            js8call_monitor.msgQueue = js8call_monitor.MessageQueue()
+            js8call_monitor.cmdQueue = js8call_monitor.MessageQueue()
             
             # Create monitor instance
-            self.monitor = js8call_monitor.JS8CallMonitor()
+            self.monitor = js8call_monitor.JS8CallMonitor(self._config)
             
-            # Start TCP or UDP
-            config = configparser.ConfigParser()
-            config.read('config')
-            tcp_enabled = False
-            try:
-                if 'TCP' in config:
-                    tcp_enabled = bool(strtobool(config['TCP'].get('enabled', 'false')))
-            except:
-                tcp_enabled = False
+            # Create monitor worker before the producers so they can
+            # report their connection state through it
+            self.monitor_thread = QThread()
+            self.monitor_worker = MonitorWorker(self.monitor)
+            self.monitor_worker.moveToThread(self.monitor_thread)
+            self.monitor_worker.error_signal.connect(self.show_error)
+            self.monitor_worker.connection_changed.connect(self._on_conn_changed)
+            self.monitor_thread.started.connect(self.monitor_worker.run)
             
-            if tcp_enabled:
-                self.tcp_client = js8call_monitor.tcp_client()
+            # Start TCP or UDP, producers call back from their own threads
+            source_name = self.source_indicator.status.name
+            def report_source(connected):
+                self.monitor_worker.connection_changed.emit(source_name, connected)
+            if self._bool('TCP', 'enabled'):
+                self.tcp_client = js8call_monitor.tcp_client(report_source, self._config)
             else:
-                self.udp_server = js8call_monitor.udp_server()
+                self.udp_server = js8call_monitor.udp_server(report_source, self._config)
             
             # Start monitor thread
-            self.monitor_thread = MonitorThread(self.monitor)
-            self.monitor_thread.error_signal.connect(self.show_error)
             self.monitor_thread.start()
             
-            # Update status to show connections
-            QTimer.singleShot(1000, lambda: self.update_status(force=True))
-            
         except Exception as e:
             self.show_error(f"Failed to start monitor: {e}")
             
-    def update_status(self, force=False):
-        """Update connection status indicators"""
-        for indicator in self.status_indicators:
-            indicator.check_status()
-            # Force connected status after initial startup
-            if force:
-                indicator.update_led(True)
+    @pyqtSlot(str, bool)
+    def _on_conn_changed(self, name, connected):
+        """Update the indicator whose connection state changed"""
+        indicator = self._indicators_by_name.get(name)
+        if indicator:
+            indicator.update_led(connected)
     
     def open_settings(self):
         """Open settings dialog"""
-        dialog = SettingsDialog(self)
+        try:
+            dialog = SettingsDialog(self)
+        except OSError as e:
+            self.show_error(f"Unable to read config: {e}")
+            return
         if dialog.exec_() == QDialog.Accepted:
             # Settings were saved, show message about restart
             pass
         
+    @pyqtSlot(str)
     def show_error(self, error_msg):
         """Display error message"""
         print(f"Error: {error_msg}")
@@ -367,9 +402,17 @@ class JS8CallMonitorGUI(QMainWindow):
         
         # Stop monitor thread
         if self.monitor_thread:
-            self.monitor_thread.stop()
+            self.monitor_worker.stop()
+            self.monitor_thread.quit()
+            # Bounded so a slow database lookup can't hang the exit
             self.monitor_thread.wait(5000)
         
+        event.accept()
+        QApplication.instance().quit()
+        
+    @pyqtSlot()
+    def cleanup(self):
+        """Close monitor sockets and log file on application exit"""
         # Close sockets and cleanup
         try:
             if self.monitor and hasattr(self.monitor, 'sock'):
@@ -385,10 +428,6 @@ class JS8CallMonitorGUI(QMainWindow):
             pass
         
         print("Cleanup complete. Exiting...")
-        event.accept()
-        
-        # Force exit
-        QTimer.singleShot(100, lambda: QApplication.quit())
 
 def main():
     """Main application entry point"""
@@ -6,40 +6,379 @@ Configuration editor module
 """
 
 import sys
+import os
+import io
+import copy
+import gc
+import json
+import time
+import stat
+import hashlib
 import configparser
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                              QGroupBox, QPushButton, QTabWidget, QLineEdit,
-                             QCheckBox, QSpinBox, QFileDialog, QMessageBox,
-                             QFormLayout, QScrollArea, QWidget)
-from PyQt5.QtCore import Qt
-from distutils.util import strtobool
+                             QCheckBox, QSpinBox, QFormLayout, QScrollArea, QWidget)
+from PyQt5.QtCore import (Qt, QTimer, QObject, QRunnable, QThreadPool,
+                          pyqtSignal, pyqtSlot)
+
+# The config path and the meaning of a true value come from the monitor
+from js8call_monitor import CONFIG_PATH, truthy
+
+# Save button style, parsed by Qt from the same string on every open
+_SAVE_BTN_QSS = """
+    QPushButton {
+        background-color: #0066cc;
+        color: white;
+        padding: 8px 16px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: #0077dd;
+    }
+"""
+
+# Shared parser for CONFIG_PATH, only re-read when the file changes
+_CFG = None
+_CFG_MTIME = None
+
+def get_config():
+    """Return the shared ConfigParser, re-reading the file if it changed"""
+    global _CFG, _CFG_MTIME
+    try:
+        mtime = os.path.getmtime(CONFIG_PATH)
+    except OSError:
+        mtime = None
+    if _CFG is None or mtime != _CFG_MTIME:
+        # No %-interpolation is used in the config, so skip that machinery.
+        # Opening the file ourselves also makes a missing config an error
+        # rather than an empty parser.
+        parser = configparser.ConfigParser(interpolation=None)
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            parser.read_file(f)
+        _CFG = parser
+        _CFG_MTIME = mtime
+    return _CFG
+
+def _config_saved():
+    """Note that the shared parser now matches what is on disk"""
+    global _CFG_MTIME
+    _CFG_MTIME = os.path.getmtime(CONFIG_PATH)
+
+def _serialize_config(config):
+    """Return the config file contents as bytes"""
+    buf = io.StringIO()
+    config.write(buf)
+    return buf.getvalue().encode('utf-8')
+
+def _matches_file(data, path=CONFIG_PATH):
+    """Check whether config bytes are identical to the file on disk"""
+    try:
+        with open(path, 'rb') as f:
+            old = f.read()
+    except FileNotFoundError:
+        return False
+    return old == data
+
+def _write_config(data, path=CONFIG_PATH):
+    """Write config bytes to a temp file, sync it and swap it in
+    
+    The rename is atomic, so a crash mid-save leaves either the old or the
+    new config behind, never a truncated one. Updating the file in place
+    (e.g. through mmap) would lose that, and for a file this small the
+    single write is not worth trading it for.
+    """
+    tmp = path + '.tmp'
+    # Keep the mode of the config being replaced, a new one is private
+    # since it holds passwords
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o600
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        try:
+            # The umask may have masked the mode, set it exactly
+            if hasattr(os, 'fchmod'):
+                os.fchmod(fd, mode)
+            # The file is small, so it goes out in a single write
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+# The save journal is rotated to <journal>.1 once it passes this size
+_JOURNAL_MAX = 1024 * 1024
+
+def _journal_save(data, path=CONFIG_PATH):
+    """Append a line recording a config save to the journal"""
+    journal = path + '.journal.jsonl'
+    try:
+        if os.path.getsize(journal) > _JOURNAL_MAX:
+            os.replace(journal, journal + '.1')
+    except FileNotFoundError:
+        pass
+    line = json.dumps({'ts': time.time(),
+                       'sha': hashlib.sha256(data).hexdigest(),
+                       'n': len(data)}) + '\n'
+    fd = os.open(journal, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+    try:
+        os.write(fd, line.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+def _config_dirty():
+    """Drop the shared parser so the next get_config re-reads the file"""
+    global _CFG
+    _CFG = None
+
+class _SaveSignals(QObject):
+    """Signals for a background config save"""
+    # ok, written, error message
+    done = pyqtSignal(bool, bool, str)
+
+class _SaveTask(QRunnable):
+    """Write serialized config bytes from the thread pool"""
+    
+    def __init__(self, data, path=CONFIG_PATH):
+        super().__init__()
+        self.data = data
+        self.path = path
+        self.signals = _SaveSignals()
+        
+    def run(self):
+        try:
+            # The file already holds exactly these bytes, skip the write
+            # and the restart prompt
+            if _matches_file(self.data, self.path):
+                self.signals.done.emit(True, False, '')
+                return
+            _write_config(self.data, self.path)
+        except Exception as e:
+            self.signals.done.emit(False, False, str(e))
+            return
+        try:
+            _journal_save(self.data, self.path)
+        except OSError as e:
+            # The config itself is saved, a journal problem shouldn't fail it
+            print(f"Could not write config journal: {e}")
+        self.signals.done.emit(True, True, '')
+
+
+class Field:
+    """One config value edited by the settings dialog
+    
+    kind is one of 'line', 'password', 'check', 'spin', 'file' or 'dir'.
+    limits is the (min, max) range used by 'spin' fields, placeholder is
+    the hint shown in an empty text field.
+    """
+    __slots__ = ('kind', 'section', 'key', 'label', 'default', 'tooltip',
+                 'limits', 'placeholder')
+    
+    def __init__(self, kind, section, key, label, default='', tooltip=None,
+                 limits=(1, 65535), placeholder=None):
+        self.kind = kind
+        self.section = section
+        self.key = key
+        self.label = label
+        self.default = default
+        self.tooltip = tooltip
+        self.limits = limits
+        self.placeholder = placeholder
+
+# Config strings for a checkbox state, indexed by isChecked()
+_BOOL_STR = ('false', 'true')
+
+# Config string getter for each editor widget class the dialog creates
+_VALUE_GETTERS = {
+    QCheckBox: lambda w: _BOOL_STR[w.isChecked()],
+    QSpinBox: lambda w: str(w.value()),
+    QLineEdit: QLineEdit.text,
+}
+
+def _widget_value(widget):
+    """Return the config string for an editor widget"""
+    return _VALUE_GETTERS[type(widget)](widget)
+
+def _vbox_layout():
+    """Return a vertical layout with the dialog's margins and spacing"""
+    layout = QVBoxLayout()
+    layout.setContentsMargins(6, 6, 6, 6)
+    layout.setSpacing(4)
+    return layout
+
+def _form_layout():
+    """Return a form layout with the dialog's margins, spacing and label alignment"""
+    layout = QFormLayout()
+    layout.setContentsMargins(6, 6, 6, 6)
+    layout.setSpacing(4)
+    layout.setLabelAlignment(Qt.AlignRight)
+    return layout
+
+# Station Info tab
+STATION_FIELDS = (
+    Field('line', 'STATION', 'operator', "Operator Callsign:", '', "Your callsign"),
+    Field('line', 'STATION', 'class', "Class:", '', "Station class (e.g., 2A)",
+          placeholder="2A"),
+    Field('line', 'STATION', 'my_gridsquare', "My Gridsquare:", '',
+          "Your Maidenhead grid square (e.g., FN31pr)", placeholder="FN31pr"),
+    Field('line', 'STATION', 'my_name', "My Name:", '', "Your name"),
+    Field('line', 'STATION', 'my_county', "My County:", '', "Your county (for county hunters)"),
+)
+
+# Source Connection tab
+TCP_FIELDS = (
+    Field('check', 'TCP', 'enabled', "Enabled:", 'false', "Enable TCP connection to JS8Call"),
+    Field('line', 'TCP', 'host', "Host:", '127.0.0.1', "JS8Call TCP host address"),
+    Field('spin', 'TCP', 'port', "Port:", '2171', "JS8Call TCP port"),
+    Field('spin', 'TCP', 'poll_status_interval', "Poll Interval (sec):", '5',
+          "Seconds between status polls", (1, 60)),
+)
+UDP_FIELDS = (
+    Field('line', 'JS8Call', 'host', "Host:", '127.0.0.1', "JS8Call UDP host address"),
+    Field('spin', 'JS8Call', 'port', "Port:", '2242', "JS8Call UDP port"),
+)
+
+# Client Connections tab, the UDP clients are built by _make_host_port_group
+GEOSERVER_ENABLES = (('enabled_msg', "Enable Messages:"), ('enabled_spot', "Enable Spots:"))
+GEOSERVER_EXTRAS = (
+    Field('password', 'GEOSERVER', 'token', "Auth Token:", ''),
+)
+YAAC_FIELDS = (
+    Field('check', 'YAAC', 'enabled', "Enabled:", 'false'),
+    Field('file', 'YAAC', 'logfile', "Log File:", 'yaac.log'),
+)
+ADIF_FIELDS = (
+    Field('check', 'ADIF', 'enabled', "Enabled:", 'false'),
+    Field('file', 'ADIF', 'logfile', "Log File:", 'adif.log'),
+)
+
+# Databases tab
+DB_LOCATION_FIELDS = (
+    Field('dir', 'DATABASES', 'location', "Database Location:", './'),
+)
+OFFLINE_DB_FIELDS = (
+    Field('check', 'DATABASES', 'FccData', "FCC Database:", 'false', "Enable FCC database lookups"),
+    Field('check', 'DATABASES', 'HamCallCD', "HamCall CD:", 'false', "Enable HamCall CD database"),
+    Field('check', 'DATABASES', 'RacCD', "RAC CD:", 'false', "Enable RAC CD database"),
+    Field('check', 'DATABASES', 'LocalDB', "Local Database:", 'false', "Enable local database lookups"),
+    Field('check', 'DATABASES', 'LocalDB_learn', "Local Learning:", 'false',
+          "Save new lookups to local database"),
+    Field('check', 'DATABASES', 'Collect_Rejects', "Collect Rejects:", 'false', "Collect failed lookups"),
+)
+ONLINE_DB_FIELDS = (
+    Field('check', 'DATABASES', 'Callook', "Callook.info:", 'false', "Enable Callook.info lookups"),
+    Field('check', 'DATABASES', 'HamCallOnline', "HamCall.net:", 'false', "Enable HamCall.net lookups"),
+    Field('line', 'DATABASES', 'HCusername', "HC Username:", '', "HamCall.net username"),
+    Field('password', 'DATABASES', 'HCpassword', "HC Password:", '', "HamCall.net password"),
+)
+
+# Logging tab
+DEBUG_FIELDS = (
+    Field('spin', 'DEBUG', 'consolelevel', "Console Level:", '0',
+          "Console log level (0=off, 10=max)", (0, 10)),
+    Field('spin', 'DEBUG', 'logfilelevel', "File Level:", '0',
+          "File log level (0=off, 10=max)", (0, 10)),
+    Field('file', 'DEBUG', 'logfile', "Log File:", 'js8monitor.log'),
+)
+SMTP_FIELDS = (
+    Field('check', 'SMTP', 'enabled', "Enabled:", 'false'),
+    Field('line', 'SMTP', 'host', "SMTP Host:", ''),
+    Field('spin', 'SMTP', 'port', "SMTP Port:", '587'),
+    Field('line', 'SMTP', 'user', "Username:", ''),
+    Field('password', 'SMTP', 'pass', "Password:", ''),
+    Field('line', 'SMTP', 'mailfrom', "From Address:", ''),
+    Field('line', 'SMTP', 'mailto', "To Address:", ''),
+)
+
+# Grid Settings tab
+GRID_FIELDS = (
+    Field('spin', 'GRIDS', 'gridlength', "Grid Length:", '6',
+          "Gridsquare precision (4, 6, 8, or 10)", (1, 11)),
+    Field('check', 'GRIDS', 'frominfo', "From INFO:", 'false', "Extract gridsquare from INFO messages"),
+    Field('check', 'GRIDS', 'map_all', "Map All:", 'false', "Map all stations regardless of callsign"),
+    Field('check', 'GRIDS', 'map_cq', "Map CQ:", 'true'),
+    Field('check', 'GRIDS', 'map_heartbeat', "Map Heartbeat:", 'true'),
+    Field('check', 'GRIDS', 'map_info', "Map INFO:", 'true'),
+    Field('check', 'GRIDS', 'map_status', "Map STATUS:", 'true'),
+    Field('check', 'GRIDS', 'map_log', "Map LOG:", 'true'),
+    Field('check', 'GRIDS', 'map_qso', "Map QSO:", 'true'),
+    Field('check', 'GRIDS', 'map_snr', "Map SNR:", 'true'),
+    Field('check', 'GRIDS', 'auto_close', "Auto Close:", 'false', "Exit monitor when JS8Call closes"),
+)
+
+# Advanced tab
+AUTH_FIELDS = (
+    Field('check', 'AUTH', 'enabled', "Enabled:", 'false', "Require authentication for API commands"),
+    Field('password', 'AUTH', 'token', "Auth Token:", '', "Authentication token for API commands"),
+)
 
 class SettingsDialog(QDialog):
     """Configuration editor dialog"""
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.config = configparser.ConfigParser()
-        self.config.read('config')
+        self.config = get_config()
+        # Editor widgets keyed by (section, key), filled in as tabs are built
+        self._widgets = {}
+        # Browse buttons mapped to the (line edit, kind) they fill in
+        self._browse_targets = {}
+        # File dialogs are created on first use and then reused
+        self._file_dialog = None
+        self._dir_dialog = None
+        self._last_browse_dir = os.path.expanduser('~')
+        # Signals of the save running on the thread pool, kept alive here.
+        # While it is set the dialog can't be cancelled or closed.
+        self._save_signals = None
+        # Plain dict snapshot of the parsed file, fields are read from here
+        # rather than going through ConfigParser.get every time
+        self._cfg = {section: dict(self.config.items(section))
+                     for section in self.config.sections()}
+        # Untouched copy to tell whether anything needs saving
+        self._cfg_orig = copy.deepcopy(self._cfg)
         self.setWindowTitle("Settings - JS8Call Monitor")
         self.setMinimumSize(700, 600)
         self.init_ui()
         
     def init_ui(self):
         """Initialize the settings UI"""
-        layout = QVBoxLayout()
+        # Hold off repaints until the whole dialog is assembled
+        self.setUpdatesEnabled(False)
+        layout = _vbox_layout()
         
         # Create tab widget
         tabs = QTabWidget()
         
-        # Add tabs
-        tabs.addTab(self.create_station_tab(), "Station Info")
-        tabs.addTab(self.create_source_tab(), "Source Connection")
-        tabs.addTab(self.create_clients_tab(), "Client Connections")
-        tabs.addTab(self.create_databases_tab(), "Databases")
-        tabs.addTab(self.create_logging_tab(), "Logging")
-        tabs.addTab(self.create_grids_tab(), "Grid Settings")
-        tabs.addTab(self.create_advanced_tab(), "Advanced")
+        # Add tabs, each page is an empty placeholder that gets filled in
+        # the first time the tab is shown
+        self._tab_builders = [
+            (self.create_station_tab, "Station Info"),
+            (self.create_source_tab, "Source Connection"),
+            (self.create_clients_tab, "Client Connections"),
+            (self.create_databases_tab, "Databases"),
+            (self.create_logging_tab, "Logging"),
+            (self.create_grids_tab, "Grid Settings"),
+            (self.create_advanced_tab, "Advanced"),
+        ]
+        self._tab_pages = []
+        self._tab_built = set()
+        for builder, title in self._tab_builders:
+            page = QWidget()
+            page_layout = QVBoxLayout()
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            page.setLayout(page_layout)
+            tabs.addTab(page, title)
+            self._tab_pages.append(page)
+        self._ensure_tab_built(0)
+        tabs.currentChanged.connect(self._ensure_tab_built)
         
         layout.addWidget(tabs)
         
@@ -55,63 +394,130 @@ class SettingsDialog(QDialog):
         cancel_btn = QPushButton("Cancel")
         cancel_btn.clicked.connect(self.reject)
         button_layout.addWidget(cancel_btn)
+        self._cancel_btn = cancel_btn
         
         save_btn = QPushButton("Save && Apply")
-        save_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #0066cc;
-                color: white;
-                padding: 8px 16px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #0077dd;
-            }
-        """)
+        # Styled on the next event loop pass so it doesn't hold up first paint
+        QTimer.singleShot(0, lambda btn=save_btn: btn.setStyleSheet(_SAVE_BTN_QSS))
         save_btn.clicked.connect(self.save_config)
         button_layout.addWidget(save_btn)
+        self._save_btn = save_btn
         
         layout.addLayout(button_layout)
         self.setLayout(layout)
+        self.setUpdatesEnabled(True)
+        
+    def _g(self, section, key, fallback=''):
+        """Get a config value from the snapshot"""
+        return self._cfg.get(section, {}).get(self.config.optionxform(key), fallback)
+        
+    def _set(self, section, key, value):
+        """Set a config value in both the snapshot and the parser"""
+        self._cfg.setdefault(section, {})[self.config.optionxform(key)] = value
+        self.config.set(section, key, value)
+        
+    def _ensure_tab_built(self, index):
+        """Build the widgets for a tab the first time it is shown"""
+        if index < 0 or index in self._tab_built:
+            return
+        builder, _ = self._tab_builders[index]
+        page = self._tab_pages[index]
+        # Settle the new rows in one pass once they are all added, and keep
+        # the cyclic GC from running over and over while the widgets are
+        # being created
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        page.setUpdatesEnabled(False)
+        try:
+            page.layout().addWidget(builder())
+        finally:
+            page.setUpdatesEnabled(True)
+            if gc_was_enabled:
+                gc.enable()
+                gc.collect(0)
+        self._tab_built.add(index)
+        
+    def _build_form(self, layout, fields):
+        """Add a row to a form layout for each field"""
+        for field in fields:
+            if field.kind == 'check':
+                widget = QCheckBox()
+                widget.setChecked(truthy(self._g(field.section, field.key, field.default)))
+            elif field.kind == 'spin':
+                widget = self._port_spin(field.section, field.key,
+                                         int(field.default), *field.limits)
+            else:
+                widget = self._line(field.section, field.key, field.default,
+                                    field.placeholder, field.kind == 'password')
+            if field.tooltip:
+                widget.setToolTip(field.tooltip)
+            self._widgets[(field.section, field.key)] = widget
+            
+            if field.kind in ('file', 'dir'):
+                # Path fields get a Browse button next to the edit box
+                row = QHBoxLayout()
+                row.addWidget(widget)
+                browse = QPushButton("Browse...")
+                self._browse_targets[browse] = (widget, field.kind)
+                browse.clicked.connect(self._browse_clicked)
+                row.addWidget(browse)
+                layout.addRow(field.label, row)
+            else:
+                layout.addRow(field.label, widget)
+                
+    def _line(self, section, key, default='', placeholder=None, password=False):
+        """Create a line edit for a config value, hinting when it is empty"""
+        value = self._g(section, key, default)
+        edit = QLineEdit(value)
+        if not value and placeholder:
+            edit.setPlaceholderText(placeholder)
+        if password:
+            edit.setEchoMode(QLineEdit.Password)
+        return edit
+        
+    def _port_spin(self, section, key, default=2171, lo=1, hi=65535):
+        """Create a spin box for a numeric config value, using the default if it isn't a number"""
+        spin = QSpinBox()
+        spin.setRange(lo, hi)
+        try:
+            value = int(self._g(section, key, default))
+        except ValueError:
+            value = default
+        spin.setValue(value)
+        return spin
+        
+    def _make_group(self, title, fields, info=None):
+        """Create a group box holding a form for the given fields"""
+        group = QGroupBox(title)
+        group_layout = _form_layout()
+        if info:
+            group_layout.addRow(QLabel(info))
+        self._build_form(group_layout, fields)
+        group.setLayout(group_layout)
+        return group
+        
+    def _make_host_port_group(self, title, section, default_port,
+                              enables=(('enabled', "Enabled:"),), extras=()):
+        """Create a group with enable checkboxes, host and port for a client"""
+        fields = [Field('check', section, key, label, 'false') for key, label in enables]
+        fields.append(Field('line', section, 'host', "Host:", '127.0.0.1'))
+        fields.append(Field('spin', section, 'port', "Port:", str(default_port)))
+        fields.extend(extras)
+        return self._make_group(title, fields)
         
     def create_station_tab(self):
         """Create station information tab"""
-        widget = QScrollArea()
-        widget.setWidgetResizable(True)
-        scroll_widget = QWidget()
-        layout = QFormLayout()
-        
-        # Operator callsign
-        self.operator_edit = QLineEdit(self.config.get('STATION', 'operator', fallback=''))
-        self.operator_edit.setToolTip("Your callsign")
-        layout.addRow("Operator Callsign:", self.operator_edit)
-        
-        # Station class
-        self.class_edit = QLineEdit(self.config.get('STATION', 'class', fallback=''))
-        self.class_edit.setToolTip("Station class (e.g., 2A)")
-        layout.addRow("Class:", self.class_edit)
+        # Short enough to never need a scroll area
+        widget = QWidget()
+        layout = _form_layout()
         
-        # My gridsquare
-        self.my_grid_edit = QLineEdit(self.config.get('STATION', 'my_gridsquare', fallback=''))
-        self.my_grid_edit.setToolTip("Your Maidenhead grid square (e.g., FN31pr)")
-        layout.addRow("My Gridsquare:", self.my_grid_edit)
-        
-        # My name
-        self.my_name_edit = QLineEdit(self.config.get('STATION', 'my_name', fallback=''))
-        self.my_name_edit.setToolTip("Your name")
-        layout.addRow("My Name:", self.my_name_edit)
-        
-        # My county
-        self.my_county_edit = QLineEdit(self.config.get('STATION', 'my_county', fallback=''))
-        self.my_county_edit.setToolTip("Your county (for county hunters)")
-        layout.addRow("My County:", self.my_county_edit)
+        self._build_form(layout, STATION_FIELDS)
         
         layout.addRow(QLabel(""))  # Spacer
         info_label = QLabel("<i>These settings identify your station in logs and QSOs</i>")
         layout.addRow(info_label)
         
-        scroll_widget.setLayout(layout)
-        widget.setWidget(scroll_widget)
+        widget.setLayout(layout)
         return widget
         
     def create_source_tab(self):
@@ -119,56 +525,11 @@ class SettingsDialog(QDialog):
         widget = QScrollArea()
         widget.setWidgetResizable(True)
         scroll_widget = QWidget()
-        layout = QVBoxLayout()
-        
-        # TCP Settings Group
-        tcp_group = QGroupBox("TCP Connection (JS8Call)")
-        tcp_layout = QFormLayout()
-        
-        self.tcp_enabled = QCheckBox()
-        tcp_enabled_val = self.config.get('TCP', 'enabled', fallback='false')
-        self.tcp_enabled.setChecked(bool(strtobool(tcp_enabled_val)))
-        self.tcp_enabled.setToolTip("Enable TCP connection to JS8Call")
-        tcp_layout.addRow("Enabled:", self.tcp_enabled)
-        
-        self.tcp_host_edit = QLineEdit(self.config.get('TCP', 'host', fallback='127.0.0.1'))
-        self.tcp_host_edit.setToolTip("JS8Call TCP host address")
-        tcp_layout.addRow("Host:", self.tcp_host_edit)
-        
-        self.tcp_port_edit = QSpinBox()
-        self.tcp_port_edit.setRange(1, 65535)
-        self.tcp_port_edit.setValue(int(self.config.get('TCP', 'port', fallback='2171')))
-        self.tcp_port_edit.setToolTip("JS8Call TCP port")
-        tcp_layout.addRow("Port:", self.tcp_port_edit)
-        
-        self.tcp_poll_edit = QSpinBox()
-        self.tcp_poll_edit.setRange(1, 60)
-        self.tcp_poll_edit.setValue(int(self.config.get('TCP', 'poll_status_interval', fallback='5')))
-        self.tcp_poll_edit.setToolTip("Seconds between status polls")
-        tcp_layout.addRow("Poll Interval (sec):", self.tcp_poll_edit)
+        layout = _vbox_layout()
         
-        tcp_group.setLayout(tcp_layout)
-        layout.addWidget(tcp_group)
-        
-        # UDP Settings Group
-        udp_group = QGroupBox("UDP Connection (JS8Call)")
-        udp_layout = QFormLayout()
-        
-        info = QLabel("<i>UDP is used if TCP is disabled</i>")
-        udp_layout.addRow(info)
-        
-        self.udp_host_edit = QLineEdit(self.config.get('JS8Call', 'host', fallback='127.0.0.1'))
-        self.udp_host_edit.setToolTip("JS8Call UDP host address")
-        udp_layout.addRow("Host:", self.udp_host_edit)
-        
-        self.udp_port_edit = QSpinBox()
-        self.udp_port_edit.setRange(1, 65535)
-        self.udp_port_edit.setValue(int(self.config.get('JS8Call', 'port', fallback='2242')))
-        self.udp_port_edit.setToolTip("JS8Call UDP port")
-        udp_layout.addRow("Port:", self.udp_port_edit)
-        
-        udp_group.setLayout(udp_layout)
-        layout.addWidget(udp_group)
+        layout.addWidget(self._make_group("TCP Connection (JS8Call)", TCP_FIELDS))
+        layout.addWidget(self._make_group("UDP Connection (JS8Call)", UDP_FIELDS,
+                                          "<i>UDP is used if TCP is disabled</i>"))
         
         layout.addStretch()
         scroll_widget.setLayout(layout)
@@ -180,116 +541,14 @@ class SettingsDialog(QDialog):
         widget = QScrollArea()
         widget.setWidgetResizable(True)
         scroll_widget = QWidget()
-        layout = QVBoxLayout()
-        
-        # N1MM Group
-        n1mm_group = QGroupBox("N1MM+ Logger")
-        n1mm_layout = QFormLayout()
-        
-        self.n1mm_enabled = QCheckBox()
-        n1mm_enabled_val = self.config.get('N1MM', 'enabled', fallback='false')
-        self.n1mm_enabled.setChecked(bool(strtobool(n1mm_enabled_val)))
-        n1mm_layout.addRow("Enabled:", self.n1mm_enabled)
-        
-        self.n1mm_host_edit = QLineEdit(self.config.get('N1MM', 'host', fallback='127.0.0.1'))
-        n1mm_layout.addRow("Host:", self.n1mm_host_edit)
-        
-        self.n1mm_port_edit = QSpinBox()
-        self.n1mm_port_edit.setRange(1, 65535)
-        self.n1mm_port_edit.setValue(int(self.config.get('N1MM', 'port', fallback='12060')))
-        n1mm_layout.addRow("Port:", self.n1mm_port_edit)
-        
-        n1mm_group.setLayout(n1mm_layout)
-        layout.addWidget(n1mm_group)
-        
-        # GridTracker Group
-        gt_group = QGroupBox("GridTracker")
-        gt_layout = QFormLayout()
-        
-        self.gt_enabled = QCheckBox()
-        gt_enabled_val = self.config.get('GRIDTRACKER', 'enabled', fallback='false')
-        self.gt_enabled.setChecked(bool(strtobool(gt_enabled_val)))
-        gt_layout.addRow("Enabled:", self.gt_enabled)
-        
-        self.gt_host_edit = QLineEdit(self.config.get('GRIDTRACKER', 'host', fallback='127.0.0.1'))
-        gt_layout.addRow("Host:", self.gt_host_edit)
-        
-        self.gt_port_edit = QSpinBox()
-        self.gt_port_edit.setRange(1, 65535)
-        self.gt_port_edit.setValue(int(self.config.get('GRIDTRACKER', 'port', fallback='2237')))
-        gt_layout.addRow("Port:", self.gt_port_edit)
-        
-        gt_group.setLayout(gt_layout)
-        layout.addWidget(gt_group)
-        
-        # GeoServer Group
-        gs_group = QGroupBox("GeoServer")
-        gs_layout = QFormLayout()
-        
-        self.gs_msg_enabled = QCheckBox()
-        gs_msg_val = self.config.get('GEOSERVER', 'enabled_msg', fallback='false')
-        self.gs_msg_enabled.setChecked(bool(strtobool(gs_msg_val)))
-        gs_layout.addRow("Enable Messages:", self.gs_msg_enabled)
-        
-        self.gs_spot_enabled = QCheckBox()
-        gs_spot_val = self.config.get('GEOSERVER', 'enabled_spot', fallback='false')
-        self.gs_spot_enabled.setChecked(bool(strtobool(gs_spot_val)))
-        gs_layout.addRow("Enable Spots:", self.gs_spot_enabled)
-        
-        self.gs_host_edit = QLineEdit(self.config.get('GEOSERVER', 'host', fallback='127.0.0.1'))
-        gs_layout.addRow("Host:", self.gs_host_edit)
-        
-        self.gs_port_edit = QSpinBox()
-        self.gs_port_edit.setRange(1, 65535)
-        self.gs_port_edit.setValue(int(self.config.get('GEOSERVER', 'port', fallback='8080')))
-        gs_layout.addRow("Port:", self.gs_port_edit)
-        
-        self.gs_token_edit = QLineEdit(self.config.get('GEOSERVER', 'token', fallback=''))
-        self.gs_token_edit.setEchoMode(QLineEdit.Password)
-        gs_layout.addRow("Auth Token:", self.gs_token_edit)
-        
-        gs_group.setLayout(gs_layout)
-        layout.addWidget(gs_group)
-        
-        # YAAC Group
-        yaac_group = QGroupBox("YAAC APRS")
-        yaac_layout = QFormLayout()
-        
-        self.yaac_enabled = QCheckBox()
-        yaac_enabled_val = self.config.get('YAAC', 'enabled', fallback='false')
-        self.yaac_enabled.setChecked(bool(strtobool(yaac_enabled_val)))
-        yaac_layout.addRow("Enabled:", self.yaac_enabled)
-        
-        yaac_file_layout = QHBoxLayout()
-        self.yaac_logfile_edit = QLineEdit(self.config.get('YAAC', 'logfile', fallback='yaac.log'))
-        yaac_file_layout.addWidget(self.yaac_logfile_edit)
-        yaac_browse = QPushButton("Browse...")
-        yaac_browse.clicked.connect(lambda: self.browse_file(self.yaac_logfile_edit))
-        yaac_file_layout.addWidget(yaac_browse)
-        yaac_layout.addRow("Log File:", yaac_file_layout)
-        
-        yaac_group.setLayout(yaac_layout)
-        layout.addWidget(yaac_group)
-        
-        # ADIF Group
-        adif_group = QGroupBox("ADIF Logger")
-        adif_layout = QFormLayout()
-        
-        self.adif_enabled = QCheckBox()
-        adif_enabled_val = self.config.get('ADIF', 'enabled', fallback='false')
-        self.adif_enabled.setChecked(bool(strtobool(adif_enabled_val)))
-        adif_layout.addRow("Enabled:", self.adif_enabled)
-        
-        adif_file_layout = QHBoxLayout()
-        self.adif_logfile_edit = QLineEdit(self.config.get('ADIF', 'logfile', fallback='adif.log'))
-        adif_file_layout.addWidget(self.adif_logfile_edit)
-        adif_browse = QPushButton("Browse...")
-        adif_browse.clicked.connect(lambda: self.browse_file(self.adif_logfile_edit))
-        adif_file_layout.addWidget(adif_browse)
-        adif_layout.addRow("Log File:", adif_file_layout)
-        
-        adif_group.setLayout(adif_layout)
-        layout.addWidget(adif_group)
+        layout = _vbox_layout()
+        
+        layout.addWidget(self._make_host_port_group("N1MM+ Logger", 'N1MM', 12060))
+        layout.addWidget(self._make_host_port_group("GridTracker", 'GRIDTRACKER', 2237))
+        layout.addWidget(self._make_host_port_group("GeoServer", 'GEOSERVER', 8080,
+                                                    GEOSERVER_ENABLES, GEOSERVER_EXTRAS))
+        layout.addWidget(self._make_group("YAAC APRS", YAAC_FIELDS))
+        layout.addWidget(self._make_group("ADIF Logger", ADIF_FIELDS))
         
         layout.addStretch()
         scroll_widget.setLayout(layout)
@@ -301,89 +560,15 @@ class SettingsDialog(QDialog):
         widget = QScrollArea()
         widget.setWidgetResizable(True)
         scroll_widget = QWidget()
-        layout = QVBoxLayout()
+        layout = _vbox_layout()
         
         # Database location
-        loc_layout = QHBoxLayout()
-        loc_label = QLabel("Database Location:")
-        loc_layout.addWidget(loc_label)
-        self.db_location_edit = QLineEdit(self.config.get('DATABASES', 'location', fallback='./'))
-        loc_layout.addWidget(self.db_location_edit)
-        db_browse = QPushButton("Browse...")
-        db_browse.clicked.connect(lambda: self.browse_directory(self.db_location_edit))
-        loc_layout.addWidget(db_browse)
+        loc_layout = _form_layout()
+        self._build_form(loc_layout, DB_LOCATION_FIELDS)
         layout.addLayout(loc_layout)
         
-        # Database options
-        db_group = QGroupBox("Offline Databases")
-        db_layout = QFormLayout()
-        
-        self.fcc_enabled = QCheckBox()
-        fcc_val = self.config.get('DATABASES', 'FccData', fallback='false')
-        self.fcc_enabled.setChecked(bool(strtobool(fcc_val)))
-        self.fcc_enabled.setToolTip("Enable FCC database lookups")
-        db_layout.addRow("FCC Database:", self.fcc_enabled)
-        
-        self.hamcallcd_enabled = QCheckBox()
-        hccd_val = self.config.get('DATABASES', 'HamCallCD', fallback='false')
-        self.hamcallcd_enabled.setChecked(bool(strtobool(hccd_val)))
-        self.hamcallcd_enabled.setToolTip("Enable HamCall CD database")
-        db_layout.addRow("HamCall CD:", self.hamcallcd_enabled)
-        
-        self.raccd_enabled = QCheckBox()
-        rac_val = self.config.get('DATABASES', 'RacCD', fallback='false')
-        self.raccd_enabled.setChecked(bool(strtobool(rac_val)))
-        self.raccd_enabled.setToolTip("Enable RAC CD database")
-        db_layout.addRow("RAC CD:", self.raccd_enabled)
-        
-        self.local_enabled = QCheckBox()
-        local_val = self.config.get('DATABASES', 'LocalDB', fallback='false')
-        self.local_enabled.setChecked(bool(strtobool(local_val)))
-        self.local_enabled.setToolTip("Enable local database lookups")
-        db_layout.addRow("Local Database:", self.local_enabled)
-        
-        self.local_learn = QCheckBox()
-        learn_val = self.config.get('DATABASES', 'LocalDB_learn', fallback='false')
-        self.local_learn.setChecked(bool(strtobool(learn_val)))
-        self.local_learn.setToolTip("Save new lookups to local database")
-        db_layout.addRow("Local Learning:", self.local_learn)
-        
-        self.collect_rejects = QCheckBox()
-        reject_val = self.config.get('DATABASES', 'Collect_Rejects', fallback='false')
-        self.collect_rejects.setChecked(bool(strtobool(reject_val)))
-        self.collect_rejects.setToolTip("Collect failed lookups")
-        db_layout.addRow("Collect Rejects:", self.collect_rejects)
-        
-        db_group.setLayout(db_layout)
-        layout.addWidget(db_group)
-        
-        # Online databases
-        online_group = QGroupBox("Online Databases")
-        online_layout = QFormLayout()
-        
-        self.callook_enabled = QCheckBox()
-        callook_val = self.config.get('DATABASES', 'Callook', fallback='false')
-        self.callook_enabled.setChecked(bool(strtobool(callook_val)))
-        self.callook_enabled.setToolTip("Enable Callook.info lookups")
-        online_layout.addRow("Callook.info:", self.callook_enabled)
-        
-        self.hamcallol_enabled = QCheckBox()
-        hcol_val = self.config.get('DATABASES', 'HamCallOnline', fallback='false')
-        self.hamcallol_enabled.setChecked(bool(strtobool(hcol_val)))
-        self.hamcallol_enabled.setToolTip("Enable HamCall.net lookups")
-        online_layout.addRow("HamCall.net:", self.hamcallol_enabled)
-        
-        self.hc_username_edit = QLineEdit(self.config.get('DATABASES', 'HCusername', fallback=''))
-        self.hc_username_edit.setToolTip("HamCall.net username")
-        online_layout.addRow("HC Username:", self.hc_username_edit)
-        
-        self.hc_password_edit = QLineEdit(self.config.get('DATABASES', 'HCpassword', fallback=''))
-        self.hc_password_edit.setEchoMode(QLineEdit.Password)
-        self.hc_password_edit.setToolTip("HamCall.net password")
-        online_layout.addRow("HC Password:", self.hc_password_edit)
-        
-        online_group.setLayout(online_layout)
-        layout.addWidget(online_group)
+        layout.addWidget(self._make_group("Offline Databases", OFFLINE_DB_FIELDS))
+        layout.addWidget(self._make_group("Online Databases", ONLINE_DB_FIELDS))
         
         layout.addStretch()
         scroll_widget.setLayout(layout)
@@ -395,67 +580,10 @@ class SettingsDialog(QDialog):
         widget = QScrollArea()
         widget.setWidgetResizable(True)
         scroll_widget = QWidget()
-        layout = QVBoxLayout()
-        
-        # Debug logging
-        debug_group = QGroupBox("Debug Logging")
-        debug_layout = QFormLayout()
-        
-        self.console_level = QSpinBox()
-        self.console_level.setRange(0, 10)
-        self.console_level.setValue(int(self.config.get('DEBUG', 'consolelevel', fallback='0')))
-        self.console_level.setToolTip("Console log level (0=off, 10=max)")
-        debug_layout.addRow("Console Level:", self.console_level)
-        
-        self.logfile_level = QSpinBox()
-        self.logfile_level.setRange(0, 10)
-        self.logfile_level.setValue(int(self.config.get('DEBUG', 'logfilelevel', fallback='0')))
-        self.logfile_level.setToolTip("File log level (0=off, 10=max)")
-        debug_layout.addRow("File Level:", self.logfile_level)
-        
-        logfile_layout = QHBoxLayout()
-        self.logfile_edit = QLineEdit(self.config.get('DEBUG', 'logfile', fallback='js8monitor.log'))
-        logfile_layout.addWidget(self.logfile_edit)
-        logfile_browse = QPushButton("Browse...")
-        logfile_browse.clicked.connect(lambda: self.browse_file(self.logfile_edit))
-        logfile_layout.addWidget(logfile_browse)
-        debug_layout.addRow("Log File:", logfile_layout)
-        
-        debug_group.setLayout(debug_layout)
-        layout.addWidget(debug_group)
-        
-        # SMTP Alerts
-        smtp_group = QGroupBox("Email Alerts (SMTP)")
-        smtp_layout = QFormLayout()
-        
-        self.smtp_enabled = QCheckBox()
-        smtp_val = self.config.get('SMTP', 'enabled', fallback='false')
-        self.smtp_enabled.setChecked(bool(strtobool(smtp_val)))
-        smtp_layout.addRow("Enabled:", self.smtp_enabled)
-        
-        self.smtp_host_edit = QLineEdit(self.config.get('SMTP', 'host', fallback=''))
-        smtp_layout.addRow("SMTP Host:", self.smtp_host_edit)
+        layout = _vbox_layout()
         
-        self.smtp_port_edit = QSpinBox()
-        self.smtp_port_edit.setRange(1, 65535)
-        self.smtp_port_edit.setValue(int(self.config.get('SMTP', 'port', fallback='587')))
-        smtp_layout.addRow("SMTP Port:", self.smtp_port_edit)
-        
-        self.smtp_user_edit = QLineEdit(self.config.get('SMTP', 'user', fallback=''))
-        smtp_layout.addRow("Username:", self.smtp_user_edit)
-        
-        self.smtp_pass_edit = QLineEdit(self.config.get('SMTP', 'pass', fallback=''))
-        self.smtp_pass_edit.setEchoMode(QLineEdit.Password)
-        smtp_layout.addRow("Password:", self.smtp_pass_edit)
-        
-        self.mail_from_edit = QLineEdit(self.config.get('SMTP', 'mailfrom', fallback=''))
-        smtp_layout.addRow("From Address:", self.mail_from_edit)
-        
-        self.mail_to_edit = QLineEdit(self.config.get('SMTP', 'mailto', fallback=''))
-        smtp_layout.addRow("To Address:", self.mail_to_edit)
-        
-        smtp_group.setLayout(smtp_layout)
-        layout.addWidget(smtp_group)
+        layout.addWidget(self._make_group("Debug Logging", DEBUG_FIELDS))
+        layout.addWidget(self._make_group("Email Alerts (SMTP)", SMTP_FIELDS))
         
         layout.addStretch()
         scroll_widget.setLayout(layout)
@@ -464,126 +592,81 @@ class SettingsDialog(QDialog):
         
     def create_grids_tab(self):
         """Create grid settings tab"""
-        widget = QScrollArea()
-        widget.setWidgetResizable(True)
-        scroll_widget = QWidget()
-        layout = QFormLayout()
-        
-        self.grid_length = QSpinBox()
-        self.grid_length.setRange(1, 11)
-        self.grid_length.setValue(int(self.config.get('GRIDS', 'gridlength', fallback='6')))
-        self.grid_length.setToolTip("Gridsquare precision (4, 6, 8, or 10)")
-        layout.addRow("Grid Length:", self.grid_length)
-        
-        self.grid_frominfo = QCheckBox()
-        frominfo_val = self.config.get('GRIDS', 'frominfo', fallback='false')
-        self.grid_frominfo.setChecked(bool(strtobool(frominfo_val)))
-        self.grid_frominfo.setToolTip("Extract gridsquare from INFO messages")
-        layout.addRow("From INFO:", self.grid_frominfo)
-        
-        self.map_all = QCheckBox()
-        mapall_val = self.config.get('GRIDS', 'map_all', fallback='false')
-        self.map_all.setChecked(bool(strtobool(mapall_val)))
-        self.map_all.setToolTip("Map all stations regardless of callsign")
-        layout.addRow("Map All:", self.map_all)
-        
-        self.map_cq = QCheckBox()
-        mapcq_val = self.config.get('GRIDS', 'map_cq', fallback='true')
-        self.map_cq.setChecked(bool(strtobool(mapcq_val)))
-        layout.addRow("Map CQ:", self.map_cq)
-        
-        self.map_heartbeat = QCheckBox()
-        maphb_val = self.config.get('GRIDS', 'map_heartbeat', fallback='true')
-        self.map_heartbeat.setChecked(bool(strtobool(maphb_val)))
-        layout.addRow("Map Heartbeat:", self.map_heartbeat)
-        
-        self.map_info = QCheckBox()
-        mapinfo_val = self.config.get('GRIDS', 'map_info', fallback='true')
-        self.map_info.setChecked(bool(strtobool(mapinfo_val)))
-        layout.addRow("Map INFO:", self.map_info)
-        
-        self.map_status = QCheckBox()
-        mapstatus_val = self.config.get('GRIDS', 'map_status', fallback='true')
-        self.map_status.setChecked(bool(strtobool(mapstatus_val)))
-        layout.addRow("Map STATUS:", self.map_status)
-        
-        self.map_log = QCheckBox()
-        maplog_val = self.config.get('GRIDS', 'map_log', fallback='true')
-        self.map_log.setChecked(bool(strtobool(maplog_val)))
-        layout.addRow("Map LOG:", self.map_log)
-        
-        self.map_qso = QCheckBox()
-        mapqso_val = self.config.get('GRIDS', 'map_qso', fallback='true')
-        self.map_qso.setChecked(bool(strtobool(mapqso_val)))
-        layout.addRow("Map QSO:", self.map_qso)
-        
-        self.map_snr = QCheckBox()
-        mapsnr_val = self.config.get('GRIDS', 'map_snr', fallback='true')
-        self.map_snr.setChecked(bool(strtobool(mapsnr_val)))
-        layout.addRow("Map SNR:", self.map_snr)
-        
-        self.auto_close = QCheckBox()
-        autoclose_val = self.config.get('GRIDS', 'auto_close', fallback='false')
-        self.auto_close.setChecked(bool(strtobool(autoclose_val)))
-        self.auto_close.setToolTip("Exit monitor when JS8Call closes")
-        layout.addRow("Auto Close:", self.auto_close)
+        # Short enough to never need a scroll area
+        widget = QWidget()
+        layout = _form_layout()
+        
+        self._build_form(layout, GRID_FIELDS)
         
         layout.addRow(QLabel(""))
         info = QLabel("<i>These settings control which message types are logged and mapped</i>")
         layout.addRow(info)
         
-        scroll_widget.setLayout(layout)
-        widget.setWidget(scroll_widget)
+        widget.setLayout(layout)
         return widget
         
     def create_advanced_tab(self):
         """Create advanced settings tab"""
-        widget = QScrollArea()
-        widget.setWidgetResizable(True)
-        scroll_widget = QWidget()
-        layout = QVBoxLayout()
-        
-        # Authentication
-        auth_group = QGroupBox("API Authentication")
-        auth_layout = QFormLayout()
-        
-        self.auth_enabled = QCheckBox()
-        auth_val = self.config.get('AUTH', 'enabled', fallback='false')
-        self.auth_enabled.setChecked(bool(strtobool(auth_val)))
-        self.auth_enabled.setToolTip("Require authentication for API commands")
-        auth_layout.addRow("Enabled:", self.auth_enabled)
-        
-        self.auth_token_edit = QLineEdit(self.config.get('AUTH', 'token', fallback=''))
-        self.auth_token_edit.setEchoMode(QLineEdit.Password)
-        self.auth_token_edit.setToolTip("Authentication token for API commands")
-        auth_layout.addRow("Auth Token:", self.auth_token_edit)
+        # Short enough to never need a scroll area
+        widget = QWidget()
+        layout = _vbox_layout()
         
-        auth_group.setLayout(auth_layout)
-        layout.addWidget(auth_group)
+        layout.addWidget(self._make_group("API Authentication", AUTH_FIELDS))
         
         layout.addStretch()
         
         info = QLabel("<i>Advanced settings for API security</i>")
         layout.addWidget(info)
         
-        scroll_widget.setLayout(layout)
-        widget.setWidget(scroll_widget)
+        widget.setLayout(layout)
         return widget
         
+    def _browse_clicked(self):
+        """Open the file or directory browser for the clicked Browse button"""
+        line_edit, kind = self._browse_targets[self.sender()]
+        if kind == 'file':
+            self.browse_file(line_edit)
+        else:
+            self.browse_directory(line_edit)
+            
+    def _browse_start(self, path):
+        """Pick the directory a browse dialog should open in"""
+        if path and os.path.isdir(path):
+            return path
+        return self._last_browse_dir
+        
     def browse_file(self, line_edit):
         """Browse for a file"""
-        filename, _ = QFileDialog.getSaveFileName(self, "Select File", line_edit.text())
-        if filename:
+        # Imported here so the native file dialog support is only loaded
+        # once someone actually browses
+        from PyQt5.QtWidgets import QFileDialog
+        if self._file_dialog is None:
+            self._file_dialog = QFileDialog(self, "Select File")
+            self._file_dialog.setAcceptMode(QFileDialog.AcceptSave)
+        current = line_edit.text()
+        self._file_dialog.setDirectory(self._browse_start(os.path.dirname(current)))
+        self._file_dialog.selectFile(os.path.basename(current))
+        if self._file_dialog.exec_() == QDialog.Accepted:
+            filename = self._file_dialog.selectedFiles()[0]
             line_edit.setText(filename)
+            self._last_browse_dir = os.path.dirname(filename)
             
     def browse_directory(self, line_edit):
         """Browse for a directory"""
-        dirname = QFileDialog.getExistingDirectory(self, "Select Directory", line_edit.text())
-        if dirname:
+        from PyQt5.QtWidgets import QFileDialog
+        if self._dir_dialog is None:
+            self._dir_dialog = QFileDialog(self, "Select Directory")
+            self._dir_dialog.setFileMode(QFileDialog.Directory)
+            self._dir_dialog.setOption(QFileDialog.ShowDirsOnly, True)
+        self._dir_dialog.setDirectory(self._browse_start(line_edit.text()))
+        if self._dir_dialog.exec_() == QDialog.Accepted:
+            dirname = self._dir_dialog.selectedFiles()[0]
             line_edit.setText(dirname)
+            self._last_browse_dir = dirname
             
     def restore_defaults(self):
         """Restore default settings"""
+        from PyQt5.QtWidgets import QMessageBox
         reply = QMessageBox.question(self, "Restore Defaults",
                                      "Are you sure you want to restore default settings?\n"
                                      "This will require restarting the application.",
@@ -596,103 +679,62 @@ class SettingsDialog(QDialog):
     def save_config(self):
         """Save configuration to file"""
         try:
-            # Update config object with form values
-            
-            # Station
-            self.config.set('STATION', 'operator', self.operator_edit.text())
-            self.config.set('STATION', 'class', self.class_edit.text())
-            self.config.set('STATION', 'my_gridsquare', self.my_grid_edit.text())
-            self.config.set('STATION', 'my_name', self.my_name_edit.text())
-            self.config.set('STATION', 'my_county', self.my_county_edit.text())
-            
-            # TCP
-            self.config.set('TCP', 'enabled', str(self.tcp_enabled.isChecked()).lower())
-            self.config.set('TCP', 'host', self.tcp_host_edit.text())
-            self.config.set('TCP', 'port', str(self.tcp_port_edit.value()))
-            self.config.set('TCP', 'poll_status_interval', str(self.tcp_poll_edit.value()))
-            
-            # UDP (JS8Call)
-            self.config.set('JS8Call', 'host', self.udp_host_edit.text())
-            self.config.set('JS8Call', 'port', str(self.udp_port_edit.value()))
-            
-            # N1MM
-            self.config.set('N1MM', 'enabled', str(self.n1mm_enabled.isChecked()).lower())
-            self.config.set('N1MM', 'host', self.n1mm_host_edit.text())
-            self.config.set('N1MM', 'port', str(self.n1mm_port_edit.value()))
-            
-            # GridTracker
-            self.config.set('GRIDTRACKER', 'enabled', str(self.gt_enabled.isChecked()).lower())
-            self.config.set('GRIDTRACKER', 'host', self.gt_host_edit.text())
-            self.config.set('GRIDTRACKER', 'port', str(self.gt_port_edit.value()))
-            
-            # GeoServer
-            self.config.set('GEOSERVER', 'enabled_msg', str(self.gs_msg_enabled.isChecked()).lower())
-            self.config.set('GEOSERVER', 'enabled_spot', str(self.gs_spot_enabled.isChecked()).lower())
-            self.config.set('GEOSERVER', 'host', self.gs_host_edit.text())
-            self.config.set('GEOSERVER', 'port', str(self.gs_port_edit.value()))
-            self.config.set('GEOSERVER', 'token', self.gs_token_edit.text())
+            # Update config object with form values, tabs that were never
+            # opened have no widgets and keep the values already in the config
+            for (section, key), widget in self._widgets.items():
+                self._set(section, key, _widget_value(widget))
             
-            # YAAC
-            self.config.set('YAAC', 'enabled', str(self.yaac_enabled.isChecked()).lower())
-            self.config.set('YAAC', 'logfile', self.yaac_logfile_edit.text())
-            
-            # ADIF
-            self.config.set('ADIF', 'enabled', str(self.adif_enabled.isChecked()).lower())
-            self.config.set('ADIF', 'logfile', self.adif_logfile_edit.text())
-            
-            # Databases
-            self.config.set('DATABASES', 'location', self.db_location_edit.text())
-            self.config.set('DATABASES', 'FccData', str(self.fcc_enabled.isChecked()).lower())
-            self.config.set('DATABASES', 'HamCallCD', str(self.hamcallcd_enabled.isChecked()).lower())
-            self.config.set('DATABASES', 'RacCD', str(self.raccd_enabled.isChecked()).lower())
-            self.config.set('DATABASES', 'LocalDB', str(self.local_enabled.isChecked()).lower())
-            self.config.set('DATABASES', 'LocalDB_learn', str(self.local_learn.isChecked()).lower())
-            self.config.set('DATABASES', 'Collect_Rejects', str(self.collect_rejects.isChecked()).lower())
-            self.config.set('DATABASES', 'Callook', str(self.callook_enabled.isChecked()).lower())
-            self.config.set('DATABASES', 'HamCallOnline', str(self.hamcallol_enabled.isChecked()).lower())
-            self.config.set('DATABASES', 'HCusername', self.hc_username_edit.text())
-            self.config.set('DATABASES', 'HCpassword', self.hc_password_edit.text())
-            
-            # Logging
-            self.config.set('DEBUG', 'consolelevel', str(self.console_level.value()))
-            self.config.set('DEBUG', 'logfilelevel', str(self.logfile_level.value()))
-            self.config.set('DEBUG', 'logfile', self.logfile_edit.text())
-            
-            # SMTP
-            self.config.set('SMTP', 'enabled', str(self.smtp_enabled.isChecked()).lower())
-            self.config.set('SMTP', 'host', self.smtp_host_edit.text())
-            self.config.set('SMTP', 'port', str(self.smtp_port_edit.value()))
-            self.config.set('SMTP', 'user', self.smtp_user_edit.text())
-            self.config.set('SMTP', 'pass', self.smtp_pass_edit.text())
-            self.config.set('SMTP', 'mailfrom', self.mail_from_edit.text())
-            self.config.set('SMTP', 'mailto', self.mail_to_edit.text())
-            
-            # Grids
-            self.config.set('GRIDS', 'gridlength', str(self.grid_length.value()))
-            self.config.set('GRIDS', 'frominfo', str(self.grid_frominfo.isChecked()).lower())
-            self.config.set('GRIDS', 'map_all', str(self.map_all.isChecked()).lower())
-            self.config.set('GRIDS', 'map_cq', str(self.map_cq.isChecked()).lower())
-            self.config.set('GRIDS', 'map_heartbeat', str(self.map_heartbeat.isChecked()).lower())
-            self.config.set('GRIDS', 'map_info', str(self.map_info.isChecked()).lower())
-            self.config.set('GRIDS', 'map_status', str(self.map_status.isChecked()).lower())
-            self.config.set('GRIDS', 'map_log', str(self.map_log.isChecked()).lower())
-            self.config.set('GRIDS', 'map_qso', str(self.map_qso.isChecked()).lower())
-            self.config.set('GRIDS', 'map_snr', str(self.map_snr.isChecked()).lower())
-            self.config.set('GRIDS', 'auto_close', str(self.auto_close.isChecked()).lower())
-            
-            # Auth
-            self.config.set('AUTH', 'enabled', str(self.auth_enabled.isChecked()).lower())
-            self.config.set('AUTH', 'token', self.auth_token_edit.text())
-            
-            # Write to file
-            with open('config', 'w') as configfile:
-                self.config.write(configfile)
+            # Nothing changed, leave the file alone
+            if self._cfg == self._cfg_orig:
+                self.accept()
+                return
             
+            data = _serialize_config(self.config)
+        except Exception as e:
+            self._save_finished(False, False, str(e))
+            return
+        
+        # The disk work runs on the thread pool so a slow fsync can't
+        # freeze the dialog, the result comes back to _save_finished
+        task = _SaveTask(data)
+        self._save_signals = task.signals
+        task.signals.done.connect(self._save_finished)
+        self._save_btn.setEnabled(False)
+        self._cancel_btn.setEnabled(False)
+        QThreadPool.globalInstance().start(task)
+        
+    @pyqtSlot(bool, bool, str)
+    def _save_finished(self, ok, written, error):
+        """Report the result of a save and close the dialog if it worked"""
+        from PyQt5.QtWidgets import QMessageBox
+        self._save_signals = None
+        self._save_btn.setEnabled(True)
+        self._cancel_btn.setEnabled(True)
+        if not ok:
+            # The shared parser may hold values that never reached the disk
+            _config_dirty()
+            QMessageBox.critical(self, "Error Saving Settings",
+                               f"Failed to save configuration:\n{error}")
+            return
+        
+        if written:
+            _config_saved()
             QMessageBox.information(self, "Settings Saved",
                                    "Configuration saved successfully!\n\n"
                                    "Please restart the application for changes to take effect.")
-            self.accept()
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Error Saving Settings",
-                               f"Failed to save configuration:\n{str(e)}")
\ No newline at end of file
+        self.accept()
+        
+    def reject(self):
+        """Cancel the dialog, unless a save is still being written"""
+        # Cancelling now wouldn't stop the write, and the result would be
+        # reported over a closed dialog
+        if self._save_signals is not None:
+            return
+        super().reject()
+        
+    def closeEvent(self, event):
+        """Keep the dialog open while a save is still being written"""
+        if self._save_signals is not None:
+            event.ignore()
+            return
+        super().closeEvent(event)
\ No newline at end of file